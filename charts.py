@@ -1,8 +1,17 @@
-"""Fetch the Billboard Hot 100 top three for a given date."""
+"""Fetch the Billboard Hot 100 top three for a given date.
+
+Lookups go through a chart source: the live Billboard scrape, an on-disk
+cache or a prebuilt local index (plus a saved fixture page for tests).
+Sources can be chained read-through, so the first hit wins and later
+(slower) sources are only asked on a miss.
+"""
 
 import datetime as dt
+import json
 import logging
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
 
 import requests
 from bs4 import BeautifulSoup
@@ -12,6 +21,8 @@ log = logging.getLogger(__name__)
 CHART_URL = "https://www.billboard.com/charts/hot-100/"
 TOP_COUNT = 3
 REQUEST_TIMEOUT = 30
+CACHE_DIR = Path("chart_cache")
+INDEX_FILE = Path("chart_index.json")
 
 
 class ChartsError(Exception):
@@ -47,3 +58,169 @@ def parse_top_three(html: str) -> list[ChartEntry]:
     if not entries:
         raise ChartsError("no chart entries found - layout changed?")
     return entries[:TOP_COUNT]
+
+
+def _entries_from_json(items: list) -> list[ChartEntry]:
+    return [ChartEntry(title=item["title"], artist=item["artist"])
+            for item in items]
+
+
+def _entries_to_json(entries: list[ChartEntry]) -> list[dict]:
+    return [{"title": entry.title, "artist": entry.artist}
+            for entry in entries]
+
+
+class ChartSource(Protocol):
+    def lookup(self, date: dt.date) -> list[ChartEntry] | None:
+        """Entries for the date, None on a miss; ChartsError on failure."""
+
+
+class BillboardSource:
+    """Live scrape of billboard.com (slow, needs network)."""
+
+    def lookup(self, date: dt.date) -> list[ChartEntry] | None:
+        return fetch_top_three(date)
+
+
+class CacheSource:
+    """One JSON file per date; filled by ChainSource on later hits."""
+
+    def __init__(self, directory: str | Path = CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, date: dt.date) -> Path:
+        return self.directory / f"{date.isoformat()}.json"
+
+    def lookup(self, date: dt.date) -> list[ChartEntry] | None:
+        path = self._path(date)
+        try:
+            return _entries_from_json(
+                json.loads(path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            log.warning("ignoring unreadable chart cache %s: %s",
+                        path, exc)
+            return None
+
+    def store(self, date: dt.date, entries: list[ChartEntry]) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._path(date).write_text(
+                json.dumps(_entries_to_json(entries)), encoding="utf-8")
+        except OSError as exc:
+            log.warning("could not write chart cache for %s: %s",
+                        date.isoformat(), exc)
+
+
+class IndexSource:
+    """Prebuilt read-only index: {"YYYY-MM-DD": [{title, artist}, ...]}."""
+
+    def __init__(self, path: str | Path = INDEX_FILE):
+        self.path = Path(path)
+        self._index: dict | None = None
+
+    def lookup(self, date: dt.date) -> list[ChartEntry] | None:
+        if self._index is None:
+            self._index = self._load()
+        items = self._index.get(date.isoformat())
+        if not items:
+            return None
+        try:
+            return _entries_from_json(items)[:TOP_COUNT]
+        except (KeyError, TypeError) as exc:
+            raise ChartsError(
+                f"bad index entry for {date.isoformat()} in "
+                f"{self.path}: {exc}") from exc
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            log.info("no chart index at %s", self.path)
+            return {}
+        except (OSError, ValueError) as exc:
+            log.warning("ignoring unreadable chart index %s: %s",
+                        self.path, exc)
+            return {}
+        if not isinstance(data, dict):
+            log.warning("ignoring chart index %s: not a JSON object",
+                        self.path)
+            return {}
+        return data
+
+
+class FixtureSource:
+    """Offline fake for tests: one saved chart page, whatever the date.
+
+    Deliberately not in SOURCE_FACTORIES, so a real run can never send
+    (or cache) its fake entries.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def lookup(self, date: dt.date) -> list[ChartEntry] | None:
+        try:
+            html = self.path.read_text(encoding="utf-8")
+        except OSError as exc:
+            raise ChartsError(
+                f"could not read fixture {self.path}: {exc}") from exc
+        return parse_top_three(html)
+
+
+class ChainSource:
+    """Read-through chain: ask each source in order until one hits.
+
+    A hit is written back to every cache in front of the hitting source.
+    A failing source counts as a miss; ChartsError only if all miss.
+    """
+
+    def __init__(self, sources: list[ChartSource]):
+        self.sources = sources
+
+    def lookup(self, date: dt.date) -> list[ChartEntry] | None:
+        errors = []
+        for position, source in enumerate(self.sources):
+            try:
+                entries = source.lookup(date)
+            except ChartsError as exc:
+                log.info("chart source %s failed: %s",
+                         type(source).__name__, exc)
+                errors.append(str(exc))
+                continue
+            if entries:
+                for earlier in self.sources[:position]:
+                    if isinstance(earlier, CacheSource):
+                        earlier.store(date, entries)
+                return entries
+        if errors:
+            raise ChartsError("; ".join(errors))
+        return None
+
+
+SOURCE_FACTORIES = {
+    "index": IndexSource,
+    "cache": CacheSource,
+    "billboard": BillboardSource,
+}
+
+
+def build_source(names: tuple[str, ...]) -> ChainSource:
+    """Chain the named sources in order (see SOURCE_FACTORIES)."""
+    unknown = [name for name in names if name not in SOURCE_FACTORIES]
+    if unknown:
+        raise ChartsError(
+            f"unknown chart source(s): {', '.join(unknown)} "
+            f"(choose from {', '.join(SOURCE_FACTORIES)})")
+    if not names:
+        raise ChartsError("no chart sources configured")
+    return ChainSource([SOURCE_FACTORIES[name]() for name in names])
+
+
+def lookup_top_three(source: ChartSource,
+                     date: dt.date) -> list[ChartEntry]:
+    entries = source.lookup(date)
+    if not entries:
+        raise ChartsError(f"no chart entries for {date.isoformat()}")
+    return entries
@@ -31,6 +31,7 @@ class AppConfig:
     bcc_addr: str | None = None
     test_recipient: str | None = None
     owner_recipient: str | None = None
+    chart_sources: tuple[str, ...] = ("billboard",)
 
 
 def load_config(path: str | Path = CONFIG_FILE) -> AppConfig:
@@ -54,6 +55,13 @@ def load_config(path: str | Path = CONFIG_FILE) -> AppConfig:
         raise ConfigError(
             f"PORT must be a number, got: {data['PORT']!r}") from exc
 
+    chart_sources = data.get("CHART_SOURCES", ["billboard"])
+    if (not isinstance(chart_sources, list) or not chart_sources
+            or not all(isinstance(name, str) for name in chart_sources)):
+        raise ConfigError(
+            "CHART_SOURCES must be a non-empty list of source names, "
+            f"got: {chart_sources!r}")
+
     return AppConfig(
         mailhost=data["MAILHOST"],
         port=port,
@@ -64,4 +72,5 @@ def load_config(path: str | Path = CONFIG_FILE) -> AppConfig:
         bcc_addr=data.get("BCC_ADDR"),
         test_recipient=data.get("TEST_RECIPIENT"),
         owner_recipient=data.get("OWNER_RECIPIENT"),
+        chart_sources=tuple(chart_sources),
     )
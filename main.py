@@ -1,6 +1,8 @@
 """Send birthday wish emails with chart extras — entry point.
 
 Usage: python main.py [-t | --test]
+                      [--profile [--profile-memory]
+                                 [--profile-flamegraph FILE]]
 Exit codes: 0 ok, 1 fatal startup problem, 2 partial send failure.
 """
 
@@ -12,12 +14,15 @@ import sys
 import charts
 import content
 import mailer
+import profiling
 import recipients
 from config import AppConfig, ConfigError, load_config
 from spotify_links import search_url
 
 BIRTHDAY_FILE = "birthdays.csv"
 BIRTHDAY_TEST_FILE = "TEST_birthdays.csv"
+BIRTHDAY_SNAPSHOT = "birthdays.snapshot.json"
+BIRTHDAY_TEST_SNAPSHOT = "TEST_birthdays.snapshot.json"
 FIRST_CHART_YEAR = 1958
 
 log = logging.getLogger(__name__)
@@ -30,11 +35,29 @@ def parse_args(argv: list[str] | None) -> argparse.Namespace:
         "-t", "--test", action="store_true",
         help="use the test CSV input file and send all mails to the "
              "test recipient (defined in .secret.json)")
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="profile the run with cProfile and write a per-module "
+             f"report to {profiling.REPORT_FILE}")
+    parser.add_argument(
+        "--profile-memory", action="store_true",
+        help="with --profile: also track per-stage memory with "
+             "tracemalloc (slows allocation-heavy code)")
+    parser.add_argument(
+        "--profile-flamegraph", metavar="FILE",
+        help="with --profile: also sample the call stack and write "
+             "folded stacks for flamegraph.pl to FILE")
+    args = parser.parse_args(argv)
+    if args.profile_flamegraph and not args.profile:
+        parser.error("--profile-flamegraph requires --profile")
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory requires --profile")
+    return args
 
 
 def gather_chart_entries(
-        person: recipients.Recipient) -> list[charts.ChartEntry]:
+        person: recipients.Recipient,
+        source: charts.ChartSource) -> list[charts.ChartEntry]:
     """Best-effort enrichment; any failure means fewer/no extras."""
     if person.year < FIRST_CHART_YEAR:
         log.info("%s was born before %d: no chart extras",
@@ -42,7 +65,7 @@ def gather_chart_entries(
         return []
     try:
         birth_date = dt.date(person.year, person.month, person.day)
-        entries = charts.fetch_top_three(birth_date)
+        entries = charts.lookup_top_three(source, birth_date)
         log.info("charts for %s: ok (%d entries)",
                  birth_date.isoformat(), len(entries))
     except (charts.ChartsError, ValueError) as exc:
@@ -55,29 +78,36 @@ def gather_chart_entries(
 
 
 def send_to_person(person: recipients.Recipient, config: AppConfig,
-                   to_addr: str) -> None:
-    entries = gather_chart_entries(person)
-    template_text = content.choose_template_path().read_text(
-        encoding="utf-8")
-    greeting = content.fill_placeholders(
-        template_text, person.firstname, person.gender, config.sender)
-    birthday = f"{person.day}.{person.month}.{person.year}"
-    postscript = content.render_postscript(birthday, entries)
-    routing_block = content.render_routing_block(person.firstname,
-                                                 person.email)
-    subject = content.review_subject(person.firstname, person.email)
-    html_body = content.compose_html(greeting, postscript,
-                                     mailer.IMAGE_CID, routing_block)
-    mailer.send_greeting(config, to_addr, subject, html_body,
-                         content.choose_image_path())
+                   to_addr: str, source: charts.ChartSource) -> None:
+    with profiling.stage("charts"):
+        entries = gather_chart_entries(person, source)
+    with profiling.stage("content"):
+        template_text = content.choose_template_path().read_text(
+            encoding="utf-8")
+        greeting = content.fill_placeholders(
+            template_text, person.firstname, person.gender, config.sender)
+        birthday = f"{person.day}.{person.month}.{person.year}"
+        postscript = content.render_postscript(birthday, entries)
+        routing_block = content.render_routing_block(person.firstname,
+                                                     person.email)
+        subject = content.review_subject(person.firstname, person.email)
+        html_body = content.compose_html(greeting, postscript,
+                                         mailer.IMAGE_CID, routing_block)
+    with profiling.stage("mailer"):
+        mailer.send_greeting(config, to_addr, subject, html_body,
+                             content.choose_image_path())
 
 
 def run(test_mode: bool) -> int:
     csv_file = BIRTHDAY_TEST_FILE if test_mode else BIRTHDAY_FILE
+    snapshot = BIRTHDAY_TEST_SNAPSHOT if test_mode else BIRTHDAY_SNAPSHOT
     try:
         config = load_config()
-        all_recipients = recipients.load_recipients(csv_file)
-    except (ConfigError, OSError) as exc:
+        with profiling.stage("recipients"):
+            all_recipients = recipients.load_recipients(csv_file,
+                                                        snapshot)
+        chart_source = charts.build_source(config.chart_sources)
+    except (ConfigError, OSError, charts.ChartsError) as exc:
         log.error("cannot start: %s", exc)
         return 1
 
@@ -106,7 +136,7 @@ def run(test_mode: bool) -> int:
         # forwards every greeting manually (specs/002)
         to_addr = test_recipient if test_mode else config.owner_recipient
         try:
-            send_to_person(person, config, to_addr)
+            send_to_person(person, config, to_addr, chart_source)
             log.info("sent mail for %s (intended: %s) to %s",
                      person.firstname, person.email, to_addr)
         except Exception as exc:
@@ -120,6 +150,10 @@ def main(argv: list[str] | None = None) -> int:
     logging.basicConfig(stream=sys.stdout, level=logging.INFO,
                         format="%(levelname)s %(message)s")
     args = parse_args(argv)
+    if args.profile:
+        return profiling.profile_call(
+            run, args.test, flamegraph_path=args.profile_flamegraph,
+            track_memory=args.profile_memory)
     return run(args.test)
 
 
@@ -0,0 +1,286 @@
+"""Profile a whole run: cProfile timings, optionally tracemalloc memory.
+
+The report groups time by this project's modules, so a slow run shows at a
+glance whether the CSV, the chart lookup, the HTML composition or the mail
+delivery was to blame. With memory tracking, each pipeline stage marked
+with stage() reports its peak and the allocations it still held at its
+end. Optionally a stack sampler writes folded stacks ("a;b;c 12" per line)
+for flamegraph.pl or speedscope.
+"""
+
+import cProfile
+import functools
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+PROJECT_DIR = Path(__file__).resolve().parent
+PROJECT_MODULES = ("main", "config", "recipients", "charts",
+                   "spotify_links", "content", "mailer")
+OTHER = "(other)"
+REPORT_FILE = Path("profile_report.txt")
+TOP_COUNT = 8
+TRACEBACK_DEPTH = 1  # allocating line only: keeps the overhead low
+SAMPLE_INTERVAL = 0.005
+
+
+@functools.cache
+def project_module(filename: str) -> str:
+    """Project module a source file belongs to, OTHER if none."""
+    path = Path(filename)
+    if path.suffix == ".py" and path.stem in PROJECT_MODULES:
+        try:
+            if path.resolve().parent == PROJECT_DIR:
+                return path.stem
+        except OSError:
+            pass
+    return OTHER
+
+
+class StackSampler:
+    """Samples one thread's call stack at a fixed interval."""
+
+    def __init__(self, thread_id: int,
+                 interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                module = frame.f_globals.get("__name__", "?")
+                stack.append(f"{module}.{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path: str | Path) -> None:
+        lines = [f"{stack} {count}\n"
+                 for stack, count in sorted(self.counts.items())]
+        Path(path).write_text("".join(lines), encoding="utf-8")
+
+
+class _MemoryStages:
+    """Per-stage memory: peak above the stage start (tracemalloc
+    reset_peak) and the allocations still held when the stage ended.
+
+    The snapshots are not part of the run: they are kept out of the
+    cProfile timings and their wall time is summed up in overhead.
+    """
+
+    def __init__(self, profiler: cProfile.Profile):
+        self.profiler = profiler
+        self.peaks: dict[str, int] = {}
+        self.held: dict[str, Counter[str]] = {}
+        self.overall_peak = 0
+        self.overhead = 0.0
+
+    def _record_overall_peak(self) -> None:
+        self.overall_peak = max(self.overall_peak,
+                                tracemalloc.get_traced_memory()[1])
+
+    def begin(self) -> tuple[tracemalloc.Snapshot, int]:
+        self.profiler.disable()
+        started = time.perf_counter()
+        before = _take_snapshot()
+        self._record_overall_peak()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        self.overhead += time.perf_counter() - started
+        self.profiler.enable()
+        return before, start
+
+    def end(self, name: str, before: tracemalloc.Snapshot,
+            start: int) -> None:
+        self.profiler.disable()
+        started = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1] - start
+        self.peaks[name] = max(self.peaks.get(name, 0), peak)
+        held = self.held.setdefault(name, Counter())
+        for diff in _take_snapshot().compare_to(before, "lineno"):
+            if diff.size_diff > 0:
+                frame = diff.traceback[0]
+                held[_site_label(frame.filename, frame.lineno)] += \
+                    diff.size_diff
+        self.overhead += time.perf_counter() - started
+        self.profiler.enable()
+
+
+_memory: _MemoryStages | None = None
+# the profiler's own allocations, including the StackSampler thread's
+# (threading.Event.wait), are not part of any stage
+_OWN_FILES = (tracemalloc.__file__, __file__, threading.__file__)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, filename) for filename in _OWN_FILES])
+
+
+class _Stage:
+    """Context manager behind stage(); a class rather than a generator
+    so its allocations stay in this (filtered) file."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.memory = _memory
+        self.state: tuple[tracemalloc.Snapshot, int] | None = None
+
+    def __enter__(self) -> None:
+        if self.memory is not None:
+            self.state = self.memory.begin()
+
+    def __exit__(self, *exc_info) -> None:
+        if self.state is not None:
+            self.memory.end(self.name, *self.state)
+
+
+def stage(name: str) -> _Stage:
+    """Mark one pipeline stage for the memory report.
+
+    A no-op unless profile_call runs with track_memory.
+    """
+    return _Stage(name)
+
+
+def profile_call(func: Callable[..., int], *args,
+                 report_path: str | Path = REPORT_FILE,
+                 flamegraph_path: str | Path | None = None,
+                 track_memory: bool = False) -> int:
+    """Run func(*args) under the profilers and write the report.
+
+    The result of func is passed through unchanged; a failure to write
+    the report is logged and never changes the run's exit code.
+    """
+    global _memory
+    sampler = None
+    if flamegraph_path is not None:
+        sampler = StackSampler(threading.get_ident())
+    profiler = cProfile.Profile()
+    if track_memory:
+        _memory = _MemoryStages(profiler)
+        tracemalloc.start(TRACEBACK_DEPTH)
+    if sampler is not None:
+        sampler.start()
+    started = time.perf_counter()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        if sampler is not None:
+            sampler.stop()
+        memory, _memory = _memory, None
+        if memory is not None:
+            memory._record_overall_peak()
+            tracemalloc.stop()
+        report = render_report(pstats.Stats(profiler), memory, elapsed)
+        try:
+            Path(report_path).write_text(report, encoding="utf-8")
+            log.info("profile report written to %s", report_path)
+            if sampler is not None:
+                sampler.write_folded(flamegraph_path)
+                log.info("folded stacks written to %s", flamegraph_path)
+        except OSError as exc:
+            log.warning("could not write profile output: %s", exc)
+
+
+def render_report(stats: pstats.Stats, memory: _MemoryStages | None,
+                  elapsed: float) -> str:
+    if memory is None:
+        lines = [f"Run time {elapsed:.3f}s"]
+    else:
+        lines = [f"Run time {elapsed - memory.overhead:.3f}s, peak traced "
+                 f"memory {_size(memory.overall_peak)}",
+                 f"Profiler overhead {memory.overhead:.3f}s (memory "
+                 "snapshots; not included above)",
+                 "Note: timings include tracemalloc overhead, which "
+                 "inflates allocation-heavy code (HTML parsing, MIME)."]
+    lines.append("")
+    lines += _time_section(stats)
+    if memory is not None:
+        lines.append("")
+        lines += _memory_section(memory)
+    return "\n".join(lines) + "\n"
+
+
+def _time_section(stats: pstats.Stats) -> list[str]:
+    by_module: dict[str, list] = {}
+    for func, (_, calls, own, cumulative, callers) in \
+            stats.stats.items():
+        module = project_module(func[0])
+        by_module.setdefault(module, []).append(
+            (func, calls, own, cumulative, callers))
+
+    lines = ["Time by module (cumulative time of entry points into the "
+             "module, includes libraries it calls):"]
+    for module in PROJECT_MODULES:
+        entries = [row for row in by_module.get(module, [])
+                   if not any(project_module(caller[0]) == module
+                              for caller in row[4])]
+        total = sum(row[3] for row in entries)
+        lines.append(f"  {module:<14} {total:9.3f}s")
+
+    for module in (*PROJECT_MODULES, OTHER):
+        rows = by_module.get(module)
+        if not rows:
+            continue
+        # self time for libraries, cumulative time for project code
+        column = 2 if module == OTHER else 3
+        label = "self" if module == OTHER else "cumulative"
+        rows.sort(key=lambda row: row[column], reverse=True)
+        lines += ["", f"Top functions in {module} ({label} time):"]
+        for row in rows[:TOP_COUNT]:
+            lines.append(f"  {row[column]:9.3f}s {row[1]:7d} calls  "
+                         f"{_func_label(row[0])}")
+    return lines
+
+
+def _memory_section(memory: _MemoryStages) -> list[str]:
+    lines = ["Peak memory per stage (above the stage's starting "
+             "level; max over repeats):"]
+    for name, peak in memory.peaks.items():
+        lines.append(f"  {name:<14} {_size(peak):>10}")
+    for name, held in memory.held.items():
+        if not held:
+            continue
+        lines += ["", f"Allocations still held when {name} ended "
+                      "(all repeats):"]
+        for site, size in held.most_common(TOP_COUNT):
+            lines.append(f"  {_size(size):>10}  {site}")
+    return lines
+
+
+def _site_label(filename: str, lineno: int) -> str:
+    path = Path(filename)
+    return f"{path.parent.name}/{path.name}:{lineno}"
+
+
+def _func_label(func: tuple) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # built-in function
+        return name
+    return f"{Path(filename).name}:{lineno}({name})"
+
+
+def _size(size: int) -> str:
+    return f"{size / 1024:.1f} KiB"
@@ -1,13 +1,27 @@
-"""Recipient records and selection rules for the birthday CSV files."""
+"""Recipient records and selection rules for the birthday CSV files.
+
+With a snapshot path, the parsed recipients are stored together with a
+hash of the CSV and a fingerprint per row: an unchanged file is loaded
+straight from the snapshot, an edited one only re-parses the rows that
+changed, and the differences to the previous run are logged.
+"""
 
 import csv
 import datetime as dt
+import hashlib
+import io
+import json
 import logging
-from dataclasses import dataclass
+import os
+from collections import Counter
+from dataclasses import dataclass, fields
 from pathlib import Path
 
 log = logging.getLogger(__name__)
 
+SNAPSHOT_VERSION = 2
+FINGERPRINT_SIZE = 16  # hex digits per row fingerprint
+
 
 @dataclass(frozen=True)
 class Recipient:
@@ -19,17 +33,128 @@ class Recipient:
     day: int
 
 
-def load_recipients(path: str | Path) -> list[Recipient]:
-    """Read active, complete rows; skip the rest (warn on bad numbers)."""
-    recipients = []
-    with open(path, newline="", encoding="utf-8") as file:
-        for row in csv.DictReader(file):
-            recipient = _parse_row(row)
-            if recipient is not None:
-                recipients.append(recipient)
+# column-wise snapshot encoding of Recipient
+FIELD_NAMES = tuple(field.name for field in fields(Recipient))
+FIELD_TYPES = tuple(field.type for field in fields(Recipient))
+_UNKNOWN = object()  # row not in the snapshot yet
+
+
+@dataclass
+class _Snapshot:
+    """Parsed CSV: one fingerprint and one recipient (None for skipped
+    rows) per data row, in file order."""
+    content_hash: str
+    header: list[str]
+    fingerprints: list[str]
+    recipients: list[Recipient | None]
+
+    def valid_recipients(self) -> list[Recipient]:
+        return [recipient for recipient in self.recipients
+                if recipient is not None]
+
+
+def load_recipients(path: str | Path,
+                    snapshot_path: str | Path | None = None
+                    ) -> list[Recipient]:
+    """Read active, complete rows; skip the rest (warn on bad numbers).
+
+    Rows already validated in the snapshot are not parsed (nor warned
+    about) again; the snapshot is rewritten whenever the CSV changed.
+    """
+    if snapshot_path is None:
+        recipients = []
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                recipient = _parse_row(row)
+                if recipient is not None:
+                    recipients.append(recipient)
+        return recipients
+
+    raw = Path(path).read_bytes()
+    content_hash = hashlib.sha256(raw).hexdigest()
+    snapshot = _read_snapshot(snapshot_path)
+    if snapshot is not None and snapshot.content_hash == content_hash:
+        log.info("recipients unchanged since last run")
+        return snapshot.valid_recipients()
+
+    parsed = _parse_rows(raw, content_hash, snapshot)
+    recipients = parsed.valid_recipients()
+    if snapshot is None:
+        log.info("no recipient snapshot yet: loaded %d recipient(s)",
+                 len(recipients))
+    else:
+        log_changes(*_changed_rows(snapshot, parsed))
+    _write_snapshot(snapshot_path, parsed)
     return recipients
 
 
+def _parse_rows(raw: bytes, content_hash: str,
+                snapshot: _Snapshot | None) -> _Snapshot:
+    """Fingerprint every row; rows already in the snapshot (under the
+    same header) are reused, only new or edited rows are parsed."""
+    header, keys, rows = _records(raw.decode("utf-8"))
+    known = {}
+    if snapshot is not None and snapshot.header == header:
+        known = dict(zip(snapshot.fingerprints, snapshot.recipients))
+    fingerprints = [
+        hashlib.blake2b(key.encode("utf-8"),
+                        digest_size=FINGERPRINT_SIZE // 2).hexdigest()
+        for key in keys]
+    recipients = [known.get(fingerprint, _UNKNOWN)
+                  for fingerprint in fingerprints]
+    for index, recipient in enumerate(recipients):
+        if recipient is _UNKNOWN:
+            values = keys[index].split(",") if rows is None else rows[index]
+            recipients[index] = _parse_row(dict(zip(header, values)))
+    return _Snapshot(content_hash, header, fingerprints, recipients)
+
+
+def _records(text: str) -> tuple[list[str], list[str],
+                                 list[list[str]] | None]:
+    """Header, a fingerprint key per non-blank row and the row values.
+
+    Without quotes or stray carriage returns a row is exactly one line
+    split at commas: the csv module (the slow part) is skipped, the line
+    is the key and values (None) are only split for rows to be parsed.
+    """
+    text = text.replace("\r\n", "\n")
+    if '"' in text or "\r" in text:
+        # rows may span lines; keys differ from the line keys on purpose
+        reader = csv.reader(io.StringIO(text, newline=""))
+        header = next(reader, [])
+        rows = [values for values in reader if values]
+        return header, ["\x1f".join(values) for values in rows], rows
+    lines = text.split("\n")
+    header = lines[0].split(",") if lines[0] else []
+    return header, [line for line in lines[1:] if line], None
+
+
+def _changed_rows(old: _Snapshot, new: _Snapshot
+                  ) -> tuple[list[Recipient], list[Recipient]]:
+    """Recipients of the rows only in old and only in new (fingerprints
+    as a multiset), so log_changes only looks at the few edited rows."""
+    surplus = Counter(old.fingerprints)
+    surplus.subtract(Counter(new.fingerprints))
+    return (_pick_rows(old, {fingerprint: count
+                             for fingerprint, count in surplus.items()
+                             if count > 0}),
+            _pick_rows(new, {fingerprint: -count
+                             for fingerprint, count in surplus.items()
+                             if count < 0}))
+
+
+def _pick_rows(snapshot: _Snapshot,
+               wanted: dict[str, int]) -> list[Recipient]:
+    people = []
+    for fingerprint, recipient in zip(snapshot.fingerprints,
+                                      snapshot.recipients):
+        if wanted.get(fingerprint, 0) > 0:
+            wanted[fingerprint] -= 1
+            if recipient is not None:
+                people.append(recipient)
+    return people
+
+
 def _parse_row(row: dict) -> Recipient | None:
     email = (row.get("email") or "").strip()
     date_fields = [(row.get(key) or "").strip()
@@ -57,3 +182,117 @@ def due_today(recipients: list[Recipient],
               today: dt.date) -> list[Recipient]:
     return [person for person in recipients
             if person.month == today.month and person.day == today.day]
+
+
+def log_changes(before: list[Recipient], after: list[Recipient]) -> None:
+    """Log added/removed/changed contacts.
+
+    Contacts are matched by (firstname, email), so family members sharing
+    one address stay apart; a "changed" contact kept name and address but
+    has a new gender or birth date.
+    """
+    old: dict[tuple[str, str], list[Recipient]] = {}
+    for person in before:
+        old.setdefault((person.firstname, person.email), []).append(person)
+    new: dict[tuple[str, str], list[Recipient]] = {}
+    for person in after:
+        new.setdefault((person.firstname, person.email), []).append(person)
+
+    added, removed, changed = [], [], []
+    for key in old.keys() | new.keys():
+        remaining_old = list(old.get(key, []))
+        remaining_new = []
+        for person in new.get(key, []):
+            if person in remaining_old:
+                remaining_old.remove(person)  # unchanged
+            else:
+                remaining_new.append(person)
+        paired = min(len(remaining_old), len(remaining_new))
+        changed += remaining_new[:paired]
+        added += remaining_new[paired:]
+        removed += remaining_old[paired:]
+
+    log.info("recipients changed since last run: %d added, %d removed, "
+             "%d changed", len(added), len(removed), len(changed))
+    for label, people in (("added", added), ("removed", removed),
+                          ("changed", changed)):
+        if people:
+            log.info("%s: %s", label, ", ".join(
+                sorted(person.firstname for person in people)))
+
+
+def _read_snapshot(path: str | Path) -> _Snapshot | None:
+    """Load and validate the snapshot once; None if absent or unusable.
+
+    Recipients are stored column-wise (one list per field) for the rows
+    that produced one; "skipped" lists the indexes of the other rows.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported version {data.get('version')}")
+        content_hash = data.get("content_hash")
+        header = data.get("header")
+        fingerprints = data.get("fingerprints")
+        skipped = data.get("skipped")
+        columns = [data.get(name) for name in FIELD_NAMES]
+        if not isinstance(content_hash, str):
+            raise ValueError("missing content_hash")
+        if (not isinstance(header, list)
+                or not all(isinstance(name, str) for name in header)):
+            raise ValueError("missing header")
+        if (not isinstance(fingerprints, str)
+                or len(fingerprints) % FINGERPRINT_SIZE):
+            raise ValueError("bad fingerprints")
+        row_count = len(fingerprints) // FINGERPRINT_SIZE
+        if (not isinstance(skipped, list)
+                or set(map(type, skipped)) - {int}
+                or len(set(skipped)) != len(skipped)
+                or not all(0 <= index < row_count for index in skipped)):
+            raise ValueError("bad skipped rows")
+        for name, column, expected in zip(FIELD_NAMES, columns,
+                                          FIELD_TYPES):
+            # e.g. a year stored as "1990" would never be due
+            if (not isinstance(column, list)
+                    or len(column) != row_count - len(skipped)
+                    or set(map(type, column)) - {expected}):
+                raise ValueError(f"mistyped recipient field: {name}")
+        built = iter(map(Recipient, *columns))
+        skipped = set(skipped)
+        return _Snapshot(
+            content_hash, header,
+            [fingerprints[start:start + FINGERPRINT_SIZE]
+             for start in range(0, len(fingerprints), FINGERPRINT_SIZE)],
+            [None if index in skipped else next(built)
+             for index in range(row_count)])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, AttributeError, KeyError,
+            TypeError) as exc:
+        log.warning("ignoring unreadable recipient snapshot %s: %s",
+                    path, exc)
+        return None
+
+
+def _write_snapshot(path: str | Path, snapshot: _Snapshot) -> None:
+    valid = snapshot.valid_recipients()
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "content_hash": snapshot.content_hash,
+        "header": snapshot.header,
+        "fingerprints": "".join(snapshot.fingerprints),
+        "skipped": [index for index, recipient
+                    in enumerate(snapshot.recipients) if recipient is None],
+    }
+    for name in FIELD_NAMES:
+        data[name] = [getattr(recipient, name) for recipient in valid]
+    temp_path = Path(f"{path}.tmp")
+    try:
+        temp_path.write_text(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8")
+        os.replace(temp_path, path)
+    except OSError as exc:
+        log.warning("could not write recipient snapshot %s: %s",
+                    path, exc)
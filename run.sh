@@ -1,7 +1,8 @@
 #!/usr/bin/env bash
 # Run the birthday wish mailer from its own venv, independent of caller's CWD
 # (the app reads .secret.json and birthdays.csv relative to the repo root).
-# Usage: ./run.sh [--test]
+# Usage: ./run.sh [-t | --test]
+#                 [--profile [--profile-memory] [--profile-flamegraph FILE]]
 set -euo pipefail
 
 cd "$(dirname "$(readlink -f "$0")")"
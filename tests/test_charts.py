@@ -1,10 +1,14 @@
-"""Chart page parsing against a saved fixture (offline)."""
+"""Chart page parsing and sources against saved fixtures (offline)."""
 
+import datetime as dt
+import json
 from pathlib import Path
 
 import pytest
 
-from charts import ChartsError, parse_top_three
+from charts import (CacheSource, ChainSource, ChartEntry, ChartsError,
+                    FixtureSource, IndexSource, build_source,
+                    parse_top_three)
 
 FIXTURE = Path(__file__).parent / "fixtures" / "billboard_sample.html"
 
@@ -31,3 +35,61 @@ def test_garbage_html_raises():
 def test_empty_html_raises():
     with pytest.raises(ChartsError):
         parse_top_three("")
+
+
+def test_fixture_source_is_offline():
+    source = FixtureSource(FIXTURE)
+    entries = source.lookup(dt.date(1990, 3, 5))
+    assert [e.title for e in entries] == [
+        "First Song", "Second Song", "Third Song"]
+
+
+def test_index_source_hit_and_miss(tmp_path):
+    index = tmp_path / "index.json"
+    index.write_text(json.dumps({"1990-03-05": [
+        {"title": "Indexed Song", "artist": "Indexed Artist"}]}),
+        encoding="utf-8")
+    source = IndexSource(index)
+    assert source.lookup(dt.date(1990, 3, 5)) == [
+        ChartEntry("Indexed Song", "Indexed Artist")]
+    assert source.lookup(dt.date(1990, 3, 6)) is None
+
+
+def test_missing_index_is_a_miss(tmp_path):
+    assert IndexSource(tmp_path / "absent.json").lookup(
+        dt.date(1990, 3, 5)) is None
+
+
+def test_chain_fills_cache_on_fallback(tmp_path):
+    cache = CacheSource(tmp_path / "cache")
+    date = dt.date(1990, 3, 5)
+    chain = ChainSource([cache, FixtureSource(FIXTURE)])
+    assert len(chain.lookup(date)) == 3
+    assert [e.title for e in cache.lookup(date)] == [
+        "First Song", "Second Song", "Third Song"]
+
+
+def test_chain_stops_at_first_hit(tmp_path):
+    cache = CacheSource(tmp_path)
+    date = dt.date(1990, 3, 5)
+    cache.store(date, [ChartEntry("Cached Song", "Cached Artist")])
+    broken = FixtureSource(tmp_path / "absent.html")
+    entries = ChainSource([cache, broken]).lookup(date)
+    assert [e.title for e in entries] == ["Cached Song"]
+
+
+def test_chain_raises_when_all_sources_fail(tmp_path):
+    chain = ChainSource([CacheSource(tmp_path),
+                         FixtureSource(tmp_path / "absent.html")])
+    with pytest.raises(ChartsError, match="absent.html"):
+        chain.lookup(dt.date(1990, 3, 5))
+
+
+def test_build_source_rejects_unknown_name():
+    with pytest.raises(ChartsError, match="spotify"):
+        build_source(("cache", "spotify"))
+
+
+def test_fixture_source_is_not_configurable():
+    with pytest.raises(ChartsError, match="fixture"):
+        build_source(("cache", "billboard", "fixture"))
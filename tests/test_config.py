@@ -49,3 +49,20 @@ def test_stale_spotify_keys_are_ignored(tmp_path):
     config = load_config(write_config(tmp_path, data))
     assert not hasattr(config, "spotify_client_id")
     assert not hasattr(config, "spotify_client_secret")
+
+
+def test_chart_sources_default_to_live_scrape(tmp_path):
+    config = load_config(write_config(tmp_path, VALID_DATA))
+    assert config.chart_sources == ("billboard",)
+
+
+def test_chart_sources_from_config(tmp_path):
+    data = VALID_DATA | {"CHART_SOURCES": ["index", "cache", "billboard"]}
+    config = load_config(write_config(tmp_path, data))
+    assert config.chart_sources == ("index", "cache", "billboard")
+
+
+def test_chart_sources_must_be_a_list(tmp_path):
+    data = VALID_DATA | {"CHART_SOURCES": "cache"}
+    with pytest.raises(ConfigError, match="CHART_SOURCES"):
+        load_config(write_config(tmp_path, data))
@@ -0,0 +1,46 @@
+"""Command-line wiring of main (no config, no mails)."""
+
+import pytest
+
+import main
+import profiling
+
+
+def test_flamegraph_without_profile_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        main.main(["--profile-flamegraph", "run.folded"])
+    assert exc_info.value.code == 2
+    assert "requires --profile" in capsys.readouterr().err
+
+
+def test_memory_without_profile_is_a_usage_error():
+    with pytest.raises(SystemExit) as exc_info:
+        main.main(["--profile-memory"])
+    assert exc_info.value.code == 2
+
+
+def test_profile_runs_through_profile_call(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(main, "run",
+                        lambda test_mode: calls.append(test_mode) or 2)
+    seen = {}
+
+    def fake_profile_call(func, *args, **kwargs):
+        seen.update(func=func, args=args, kwargs=kwargs)
+        return func(*args)
+
+    monkeypatch.setattr(profiling, "profile_call", fake_profile_call)
+    folded = str(tmp_path / "run.folded")
+    assert main.main(["--test", "--profile", "--profile-memory",
+                      "--profile-flamegraph", folded]) == 2
+    assert seen["func"] is main.run
+    assert seen["args"] == (True,)
+    assert seen["kwargs"] == {"flamegraph_path": folded,
+                              "track_memory": True}
+    assert calls == [True]
+
+
+def test_without_profile_run_is_called_directly(monkeypatch):
+    monkeypatch.setattr(main, "run", lambda test_mode: 0)
+    monkeypatch.setattr(profiling, "profile_call", None)  # must not be used
+    assert main.main([]) == 0
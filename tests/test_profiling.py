@@ -0,0 +1,100 @@
+"""Profiling mode: report grouping, memory stages, folded stacks."""
+
+import datetime as dt
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from charts import FixtureSource
+from profiling import profile_call, project_module, stage
+from recipients import load_recipients
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def sample_run(exit_code):
+    with stage("recipients"):
+        load_recipients(FIXTURES / "birthdays_fixture.csv")
+    with stage("charts"):
+        source = FixtureSource(FIXTURES / "billboard_sample.html")
+        source.lookup(dt.date(1990, 3, 5))
+    return exit_code
+
+
+def test_project_module_only_matches_repo_files():
+    import charts
+    assert project_module(charts.__file__) == "charts"
+    assert project_module("/usr/lib/python3/charts.py") == "(other)"
+    assert project_module("~") == "(other)"
+
+
+def test_report_is_grouped_by_project_module(tmp_path):
+    report_path = tmp_path / "report.txt"
+    assert profile_call(sample_run, 2, report_path=report_path) == 2
+    report = report_path.read_text(encoding="utf-8")
+    assert "Top functions in recipients" in report
+    assert "Top functions in charts" in report
+    assert "load_recipients" in report
+    assert "memory" not in report
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_is_reported_per_stage(tmp_path):
+    report_path = tmp_path / "report.txt"
+    profile_call(sample_run, 0, report_path=report_path,
+                 track_memory=True)
+    report = report_path.read_text(encoding="utf-8")
+    assert "timings include tracemalloc overhead" in report
+    assert "Peak memory per stage" in report
+    assert "  recipients " in report
+    assert "  charts " in report
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_is_left_out_of_memory_and_run_time(tmp_path):
+    report_path = tmp_path / "report.txt"
+
+    def slow_run():
+        for _ in range(10):
+            sample_run(0)
+        return 0
+
+    started = time.perf_counter()
+    profile_call(slow_run, report_path=report_path,
+                 flamegraph_path=tmp_path / "run.folded",
+                 track_memory=True)
+    wall = time.perf_counter() - started
+    report = report_path.read_text(encoding="utf-8")
+    run_time = float(re.search(r"Run time ([\d.]+)s", report)[1])
+    overhead = float(re.search(r"Profiler overhead ([\d.]+)s", report)[1])
+    assert overhead > 0
+    assert run_time + overhead <= wall
+    memory = report.split("Peak memory per stage")[1]
+    for own_file in ("profiling.py", "contextlib.py", "threading.py",
+                     "tracemalloc.py"):
+        assert own_file not in memory
+
+
+def test_stage_is_a_no_op_outside_profiling():
+    with stage("charts"):
+        pass
+    assert not tracemalloc.is_tracing()
+
+
+def test_flamegraph_output_is_folded_stacks(tmp_path):
+    folded = tmp_path / "run.folded"
+
+    def slow_run():
+        for _ in range(20):
+            sample_run(0)
+        return 0
+
+    profile_call(slow_run, report_path=tmp_path / "report.txt",
+                 flamegraph_path=folded)
+    lines = folded.read_text(encoding="utf-8").splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert ";" in stack or "." in stack
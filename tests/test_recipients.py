@@ -1,6 +1,7 @@
 """Selection rules against the synthetic fixture CSV (FR-002)."""
 
 import datetime as dt
+import time
 from pathlib import Path
 
 from recipients import due_today, load_recipients
@@ -38,3 +39,150 @@ def test_due_today_matches_month_and_day():
 def test_due_today_empty_when_no_match():
     people = load_recipients(FIXTURE)
     assert due_today(people, dt.date(2026, 12, 24)) == []
+
+
+def test_snapshot_matches_plain_load(tmp_path):
+    snapshot = tmp_path / "snapshot.json"
+    first = load_recipients(FIXTURE, snapshot)
+    assert snapshot.exists()
+    assert first == load_recipients(FIXTURE)
+    assert load_recipients(FIXTURE, snapshot) == first
+
+
+def test_unchanged_file_skips_parsing(tmp_path, caplog, monkeypatch):
+    snapshot = tmp_path / "snapshot.json"
+    load_recipients(FIXTURE, snapshot)
+    monkeypatch.setattr("recipients._parse_row", None)  # must not be used
+    caplog.clear()
+    with caplog.at_level("INFO"):
+        people = load_recipients(FIXTURE, snapshot)
+    assert [person.firstname for person in people] == [
+        "Anna", "Ben", "Greta"]
+    assert "Falk" not in caplog.text
+
+
+def test_edited_file_reparses_only_changed_rows(tmp_path, caplog):
+    csv_file = tmp_path / "birthdays.csv"
+    snapshot = tmp_path / "snapshot.json"
+    text = FIXTURE.read_text(encoding="utf-8")
+    csv_file.write_text(text, encoding="utf-8")
+    load_recipients(csv_file, snapshot)
+
+    edited = (text.replace("ben@example.org", "ben@example.com")
+              .replace("1,Muster,Greta,greta@example.org,1955,4,6,f\n", "")
+              + "1,Muster,Hugo,hugo@example.org,1970,5,1,m\n")
+    csv_file.write_text(edited, encoding="utf-8")
+    caplog.clear()
+    with caplog.at_level("INFO"):
+        people = load_recipients(csv_file, snapshot)
+    assert [person.firstname for person in people] == [
+        "Anna", "Ben", "Hugo"]
+    assert "Falk" not in caplog.text  # unchanged bad row: no re-warning
+    assert "2 added, 2 removed, 0 changed" in caplog.text
+
+
+def test_changed_contact_is_reported(tmp_path, caplog):
+    csv_file = tmp_path / "birthdays.csv"
+    snapshot = tmp_path / "snapshot.json"
+    text = FIXTURE.read_text(encoding="utf-8")
+    csv_file.write_text(text, encoding="utf-8")
+    load_recipients(csv_file, snapshot)
+    csv_file.write_text(text.replace("Anna,anna@example.org,1950",
+                                     "Anna,anna@example.org,1951"),
+                        encoding="utf-8")
+    with caplog.at_level("INFO"):
+        load_recipients(csv_file, snapshot)
+    assert "0 added, 0 removed, 1 changed" in caplog.text
+    assert "changed: Anna" in caplog.text
+
+
+def test_corrupt_snapshot_falls_back_to_full_parse(tmp_path, caplog):
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text("{not json", encoding="utf-8")
+    with caplog.at_level("WARNING"):
+        people = load_recipients(FIXTURE, snapshot)
+    assert len(people) == 3
+    assert "unreadable recipient snapshot" in caplog.text
+
+
+def test_snapshot_without_hash_falls_back_to_full_parse(tmp_path, caplog):
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(
+        '{"version": 2, "header": [], "fingerprints": "", "rows": []}',
+        encoding="utf-8")
+    with caplog.at_level("WARNING"):
+        people = load_recipients(FIXTURE, snapshot)
+    assert len(people) == 3
+    assert "content_hash" in caplog.text
+
+
+def test_snapshot_with_mistyped_field_is_ignored(tmp_path, caplog):
+    snapshot = tmp_path / "snapshot.json"
+    load_recipients(FIXTURE, snapshot)
+    snapshot.write_text(snapshot.read_text(encoding="utf-8").replace(
+        '"year":[1950,', '"year":["1950",'), encoding="utf-8")
+    with caplog.at_level("WARNING"):
+        people = load_recipients(FIXTURE, snapshot)
+    assert people[0].year == 1950
+    assert "mistyped recipient field: year" in caplog.text
+
+
+def test_shared_address_is_not_merged(tmp_path, caplog):
+    csv_file = tmp_path / "birthdays.csv"
+    snapshot = tmp_path / "snapshot.json"
+    header = "active,name,firstname,email,year,month,day,gender\n"
+    anna = "1,Muster,Anna,family@example.org,1980,3,5,f\n"
+    ben = "1,Muster,Ben,family@example.org,2010,7,1,m\n"
+    csv_file.write_text(header + anna, encoding="utf-8")
+    load_recipients(csv_file, snapshot)
+    csv_file.write_text(header + anna + ben, encoding="utf-8")
+    caplog.clear()
+    with caplog.at_level("INFO"):
+        people = load_recipients(csv_file, snapshot)
+    assert [person.firstname for person in people] == ["Anna", "Ben"]
+    assert "1 added, 0 removed, 0 changed" in caplog.text
+    assert "added: Ben" in caplog.text
+
+
+def test_quoted_csv_matches_plain_load(tmp_path):
+    csv_file = tmp_path / "birthdays.csv"
+    snapshot = tmp_path / "snapshot.json"
+    csv_file.write_text(
+        "active,name,firstname,email,year,month,day,gender\r\n"
+        '1,"Muster, Dr.",Anna,anna@example.org,1950,3,5,f\r\n'
+        "1,Muster,Ben,ben@example.org,1990,3,5,m\r\n", encoding="utf-8")
+    expected = load_recipients(csv_file)
+    assert [person.firstname for person in expected] == ["Anna", "Ben"]
+    assert load_recipients(csv_file, snapshot) == expected
+    assert load_recipients(csv_file, snapshot) == expected
+
+
+def best_time(load, prepare=lambda: None, repeats=7):
+    times = []
+    for _ in range(repeats):
+        prepare()
+        started = time.perf_counter()
+        load()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def test_snapshot_paths_beat_a_plain_parse(tmp_path):
+    """Benchmark: the snapshot only pays off if it is faster."""
+    header = "active,name,firstname,email,year,month,day,gender\n"
+    rows = [f"1,Muster,Name{i},p{i}@example.org,{1950 + i % 60},"
+            f"{1 + i % 12},{1 + i % 28},f\n" for i in range(10000)]
+    csv_file = tmp_path / "birthdays.csv"
+    edited_file = tmp_path / "edited.csv"
+    snapshot = tmp_path / "snapshot.json"
+    csv_file.write_text(header + "".join(rows), encoding="utf-8")
+    rows[5] = rows[5].replace("Name5", "Nina")
+    edited_file.write_text(header + "".join(rows), encoding="utf-8")
+
+    plain = best_time(lambda: load_recipients(csv_file))
+    load_recipients(csv_file, snapshot)
+    unchanged = best_time(lambda: load_recipients(csv_file, snapshot))
+    edited = best_time(lambda: load_recipients(edited_file, snapshot),
+                       lambda: load_recipients(csv_file, snapshot))
+    assert unchanged < plain / 2
+    assert edited < plain